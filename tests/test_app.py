@@ -0,0 +1,122 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import FastAPI
+
+from xtracto import App, Config
+
+page_title = "MODVAL"  # resolved by pages served through App from the scope that created it
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def touch_later(path):
+    """
+    Moves the mtime of path forward, a rewrite within the same clock tick would otherwise go unnoticed
+    """
+    mtime = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    def make(production=False):
+        write(str(tmp_path / "xtracto.config.py"),
+              f'modules_dir = "components"\npages_dir = "pages"\nproduction = {production}\ndebug = False\n')
+        monkeypatch.setenv("XTRACTO_PROJECT_ROOT", str(tmp_path))
+        monkeypatch.chdir(tmp_path)
+        Config.reload()
+        return tmp_path
+
+    yield make
+    Config.reload()
+
+
+def serve(app, path):
+    for route in app.app.routes:
+        if getattr(route, "path", None) == "/{path:path}":
+            return asyncio.run(route.endpoint(path=path)).body.decode()
+    raise LookupError("page route not registered")
+
+
+def test_module_scope_variable(project):
+    root = project()
+    write(str(root / "pages" / "index.pypx"), "div\n    {{page_title}}")
+    app = App(FastAPI(), auto_run=False)
+    assert "MODVAL" in serve(app, "")
+
+
+def test_scope_pages_are_not_cached_outside_production(project):
+    root = project()
+    write(str(root / "pages" / "index.pypx"), "div\n    {{page_title}}")
+    app = App(FastAPI(), auto_run=False)
+    assert "MODVAL" in serve(app, "")
+    assert "index.pypx" not in app._pages
+    global page_title
+    page_title = "CHANGED"
+    try:
+        assert "CHANGED" in serve(app, "")
+    finally:
+        page_title = "MODVAL"
+
+
+def test_cache_hit_and_invalidation(project):
+    root = project()
+    write(str(root / "components" / "button.pypx"), "button\n    first")
+    write(str(root / "pages" / "index.pypx"), "div\n    [[button.pypx]]")
+    app = App(FastAPI(), auto_run=False)
+    assert "first" in serve(app, "")
+    assert app._cached_page("index.pypx") is not None
+    write(str(root / "components" / "button.pypx"), "button\n    second")
+    touch_later(str(root / "components" / "button.pypx"))
+    assert app._cached_page("index.pypx") is None
+    assert "second" in serve(app, "")
+    assert app._cached_page("index.pypx") is not None
+
+
+def test_prebuild_pages(project):
+    root = project(production=True)
+    write(str(root / "pages" / "index.pypx"), "div\n    {{page_title}}")
+    write(str(root / "pages" / "docs" / "about.pypx"), "p\n    about")
+    app = App(FastAPI(), auto_run=False)
+    assert set(app._pages) == {"index.pypx", "docs/about.pypx"}
+    stamp, html_content = app._pages["index.pypx"]
+    assert stamp is None
+    assert "MODVAL" in html_content
+    assert "about" in app._pages["docs/about.pypx"][1]
+    assert serve(app, "docs/about") == app._pages["docs/about.pypx"][1]
+
+
+def test_bundle_reuse_and_stale_cleanup(project):
+    root = project()
+    components = root / "components"
+    # files of an unknown type are bundled without calling out to a validator
+    write(str(components / "a.txt"), "first part\n")
+    write(str(components / "b.txt"), "second part\n")
+    write(str(root / "pages" / "index.pypx"), "div\n    [{a.txt}]\n    [{b.txt}]")
+
+    def bundles():
+        return sorted(name for name in os.listdir(components) if name.startswith("index.pypx."))
+
+    app = App(FastAPI(), auto_run=False)
+    serve(app, "")
+    first = bundles()
+    assert len(first) == 1
+    bundle_mtime = os.stat(components / first[0]).st_mtime_ns
+    app._pages.clear()
+    serve(app, "")
+    assert bundles() == first
+    assert os.stat(components / first[0]).st_mtime_ns == bundle_mtime
+    write(str(components / "b.txt"), "changed part\n")
+    touch_later(str(components / "b.txt"))
+    serve(app, "")
+    second = bundles()
+    assert len(second) == 1 and second != first
+    with open(components / second[0]) as f:
+        assert f.read() == "first part\nchanged part\n"
+    assert not [name for name in os.listdir(components) if name.endswith(".tmp")]
@@ -1,18 +1,86 @@
 """
 A web framework for integration with pypx
+
+Environment variables:
+- XTRACTO_PROJECT_ROOT: directory containing xtracto.config.py, skips searching the parent directories for it
 """
 __version__ = "0.0.6"
 __author__ = "shashstormer"
 __description__ = "A web framework for integration with pypx"
 
+import functools
+import hashlib
+import importlib.util
 import os
 import re
+import subprocess
+import sys
+import threading
+import time
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
+import requestez.helpers as ez_helper
 from fastapi import FastAPI, HTTPException, status, Response, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from pytailwind import Tailwind
 
 MAXIMUM_DEPTH_PROJECT_ROOT = 100
 
+_VARS_RE = re.compile(r"\{\{(.*?)}}")
+_FILEGROUP_BUNDLE_RE = re.compile(r"(\[\{.*?}])")
+_FILE_BUNDLE_RE = re.compile(r"\[\{([a-zA-Z0-9. /\\]+)")
+_PARAM_BUNDLE_RE = re.compile(r"\[\{[a-zA-Z0-9.]+\|\|(.*?)\|\|.*?")
+_FILEGROUP_IMPORT_RE = re.compile(r"(\[\[.*?]])")
+_FILE_IMPORT_RE = re.compile(r"\[\[([a-zA-Z0-9. /\\]+)")
+_PARAM_IMPORT_RE = re.compile(r"\[\[[a-zA-Z0-9.]+\|\|(.*?)\|\|.*?")
+_LOADERS_RE = re.compile(r"\+\$(.*?)\$\+")
+_LOADER_TOKENS_RE = re.compile(r"(\+\$.*?\$\+)")
+_STATIC_RE = re.compile(r"\?:(.*?)\?:")
+_COMMENT_RE = re.compile(r"(::.*?::)")
+_UNSAFE_PATH_RE = re.compile(r"^_|\.\./|\.\.\\/")  # private files and directory traversal
+_TRIM_RE = re.compile(r"^(?:#&N#|\s)+|(?:#&N#|\s)+$")  # leading/trailing line joints and whitespace
+
+_GROUPS = (
+    ("::", "::"),  # Removed comment
+    ("?:", "?:"),  # File to be included as static asset
+    ("{{", "}}"),  # Variable Field
+    (";;", ";;"),  # HTML Attribute
+    ("[[", "]]"),  # Import Files and embed them into the generated html
+    ("(-(", ")-)"),  # Markdown Content
+    ("{[", "]}"),  # Bundling groups
+    ("+-", "-+"),  # Set Python variable values in pypx
+)
+_VOID_ELEMENTS = frozenset((
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+))
+_ELEMENTS = frozenset((
+    "!DOCTYPE html", "abbreviation", "acronym", "address", "anchor", "applet", "article", "aside",
+    "audio", "basefont", "bdi", "bdo", "bgsound", "big", "blockquote", "body", "bold", "break",
+    "button", "caption", "canvas", "center", "cite", "code", "colgroup", "column", "comment", "data",
+    "datalist", "dd", "define", "delete", "details", "dialog", "dir", "div", "dl", "dt", "embed", "fieldset",
+    "figcaption", "figure", "font", "footer", "form", "frame", "frameset", "head", "header", "heading",
+    "hgroup", "html", "iframe", "ins", "isindex", "italic", "kbd", "keygen", "label",
+    "legend", "list", "main", "mark", "marquee", "menuitem", "meter", "nav", "nobreak", "noembed",
+    "noscript", "object", "optgroup", "option", "output", "paragraphs", "phrase", "pre", "progress",
+    "q", "rp", "rt", "ruby", "s", "samp", "section", "small", "spacer", "span", "strike", "strong",
+    "style", "sub", "sup", "summary", "svg", "table", "tbody", "td", "template", "tfoot", "th", "thead",
+    "time", "title", "tr", "tt", "underline", "var", "video", "xmp"
+))
+
 validated_files = {}
 
 
@@ -26,7 +94,6 @@ class Utils:
         Parameters:
         - module_path: path of python module to import
         """
-        import importlib.util
         spec = importlib.util.spec_from_file_location("module_name", module_path)
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
@@ -34,7 +101,18 @@ class Utils:
 
     @staticmethod
     def get_project_root():
-        current_script = os.getcwd()
+        env_root = os.environ.get("XTRACTO_PROJECT_ROOT")
+        if env_root and os.path.isdir(env_root):
+            return env_root
+        return Utils._find_project_root(os.getcwd())
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _find_project_root(current_script):
+        """
+        Walks up from current_script to the directory holding xtracto.config.py,
+        cached per working directory so the walk is only done once (cleared by Config.reload)
+        """
         ic = 0
         while current_script:
             if os.path.exists(os.path.join(current_script, 'xtracto.config.py')):
@@ -89,18 +167,20 @@ class Utils:
 
     @staticmethod
     def get_variable_value_from_nearest_frame(_variable_name, _default_value=False, _raise_error=True,
-                                              _use_current=True, _skip_after_current=2):
+                                              _use_current=True, _skip_after_current=2, _locals=None, _scope=None,
+                                              _origins=None):
         """
             :param _variable_name: The Name of the variable whose value needs to be retrived.
             :param _default_value: This default value is used only in the case that there is no default value mentioned in the placeholder.
             :param _raise_error: Raise error if the variable is not found in any scope.
             :param _use_current: Look for variable in the calling scope.
             :param _skip_after_current: Number of frames to skip without looking for the variable value (current frame controlled by _use_current).
+            :param _locals: Extra variables of the first scope looked in, its own locals take precedence.
+            :param _scope: Variables looked in after every frame, for values defined where the stack does not reach.
+            :param _origins: A set, "scope" is added to it when the value is found outside of xtracto.
             :return:
             """
-        import inspect as _inspect
-        _frame = _inspect.currentframe()
-        _frame = _frame.f_back
+        _frame = sys._getframe(1)
         if not _use_current:
             while _skip_after_current > 0:
                 if hasattr(_frame, 'f_back'):
@@ -111,16 +191,28 @@ class Utils:
                     _value = _default_value
                 _skip_after_current -= 1
         while _frame:
-            if _variable_name in _frame.f_locals:
-                _local_value = _frame.f_locals[_variable_name]
-                _value = _local_value
+            # f_locals builds a fresh mapping on every access, read it once per frame
+            _frame_locals = _frame.f_locals
+            if _variable_name in _frame_locals:
+                _value = _frame_locals[_variable_name]
+                if _origins is not None and _frame.f_globals is not globals():
+                    _origins.add("scope")
                 break
+            if _locals is not None:
+                if _variable_name in _locals:
+                    _value = _locals[_variable_name]
+                    break
+                _locals = None
             if _skip_after_current <= 0:
                 _frame = _frame.f_back
             while _skip_after_current > 0:
                 _frame = _frame.f_back
                 _skip_after_current -= 1
         else:
+            if _scope is not None and _variable_name in _scope:
+                if _origins is not None:
+                    _origins.add("scope")
+                return _scope[_variable_name]
             if Config().raise_value_errors_while_importing and _raise_error:
                 raise NameError(f"variable \"{_variable_name}\" has not been defined")
             _value = _default_value
@@ -134,7 +226,6 @@ class Utils:
             Returns:
             - bool: True if module is installed, False otherwise.
             """
-        import subprocess
         try:
             subprocess.run([module_name, '--version'], check=True)
             return True
@@ -162,7 +253,7 @@ class Utils:
 
 
 class Parser:
-    def __init__(self, path=None, content=None, module=False, layout=False, _additional_contexts=None):
+    def __init__(self, path=None, content=None, module=False, layout=False, _additional_contexts=None, _scope=None):
         """
         Wrapper for parsing a pypx to a deliverable html file.
         """
@@ -185,15 +276,13 @@ class Parser:
         self.module = module
         if _additional_contexts is None:
             _additional_contexts = []
-        self.pypx_parser = Pypx(self.content, self.raw_origin, _additional_contexts=_additional_contexts)
-        _additional_contexts.extend(self.pypx_parser.contexts)
-        _additional_contexts = list(set(_additional_contexts))
-        self.contexts = _additional_contexts
+        self.pypx_parser = Pypx(self.content, self.raw_origin, _additional_contexts=_additional_contexts, _scope=_scope)
+        self.contexts = set(self.pypx_parser.contexts)
         del path, content, module, layout
         if self.content:
             if self.layout:
-                _ = [self.pypx_parser.parsed]
-                _.extend(self.contexts)
+                _ = set(self.contexts)
+                _.add(self.pypx_parser.parsed)
                 self.pypx_parser.load_variables(_addnl_var_contexts=_)
             self.parse()
 
@@ -202,49 +291,42 @@ class Parser:
         if not self.module:
             self.static_requirements.update(self.pypx_parser.parse_static_import())
             self.static_requirements.update(self.pypx_parser.static_requirements)
-        self.contexts.extend(self.pypx_parser.contexts)
-        self.contexts = list(set(self.contexts))
+        self.contexts.update(self.pypx_parser.contexts)
         self.html_content = self.pypx_parser.normalize(self.pypx_parser.parsed)
-        self.contexts.extend(self.pypx_parser.contexts)
-        self.contexts = list(set(self.contexts))
 
     def render(self):
-        _loaders_match = re.compile("\+\$(.*?)\$\+")
         _load_list = []
-        self.contexts.append(self.pypx_parser.parsed)
-        self.contexts.extend(self.contexts)
-        for _load in _loaders_match.findall("\n".join(self.contexts)):
+        self.contexts.add(self.pypx_parser.parsed)
+        for _load in _LOADERS_RE.findall("\n".join(self.contexts)):
             _load_list.append(_load.split("=", 1))
         for var, val in _load_list:
             locals()[var] = val
         self.pypx_parser.load_variables(_addnl_var_contexts=self.contexts)
-        self.contexts.extend(self.pypx_parser.contexts)
-        self.contexts = list(set(self.contexts))
         self.pypx_parser.do_imports()
-        self.contexts.extend(self.pypx_parser.contexts)
-        self.contexts = list(set(self.contexts))
-        self.pypx_parser.load_variables(_addnl_var_contexts=self.contexts)
-        self.contexts.extend(self.pypx_parser.contexts)
-        self.contexts = list(set(self.contexts))
+        # the pypx contexts only grow, one merge after the imports covers every step
+        self.contexts.update(self.pypx_parser.contexts)
+        if self.pypx_parser._vars_dirty:
+            self.pypx_parser.load_variables(_addnl_var_contexts=self.contexts)
         self.html_content = self.pypx_parser.normalize(self.pypx_parser.parsed)
 
     def clear_variables(self):
-        _loaders_match = re.compile("(\+\$.*?\$\+)")
-        _matches = _loaders_match.findall(self.html_content)
+        _matches = _LOADER_TOKENS_RE.findall(self.html_content)
         for _match in _matches:
             self.html_content = self.html_content.replace(_match, '')
     def load_tailwind(self):
-        self.contexts.append(self.html_content)
+        self.contexts.add(self.html_content)
         self.pypx_parser.load_variables(_addnl_var_contexts=self.contexts, _parse_tailwind=True)
         self.html_content = self.pypx_parser.normalize(self.pypx_parser.parsed)
 
 class Config:
+    _modules = {}
+
     def __init__(self, project_root=None):
         """
         load xtracto.config.py
         """
         if project_root is None:
-            config = Utils.import_module_by_path(Utils.get_config_file())
+            config = Config._load_config_module(Utils.get_config_file())
             self.project_root = Utils.get_project_root()
             self.module_root = Utils.root_path(getattr(config, "modules_dir", "xtractocomponents"))
             self.pages_root = Utils.root_path(getattr(config, "pages_dir", "xtractopages"))
@@ -260,8 +342,35 @@ class Config:
         self.raise_value_errors_while_importing = getattr(config, 'raise_value_errors_while_importing', True)
         del config
 
+    @staticmethod
+    def _load_config_module(path):
+        """
+        Imports the config module once per (path, mtime), so editing xtracto.config.py is still picked up
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        cached = Config._modules.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        module = Utils.import_module_by_path(path)
+        Config._modules[path] = (mtime, module)
+        return module
+
+    @staticmethod
+    def reload():
+        """
+        Drops the cached project root and config module, the next Config() reads xtracto.config.py again
+        """
+        Config._modules.clear()
+        Utils._find_project_root.cache_clear()
+
 
 class Log:
+    _logger = None  # the logger is only rebuilt when the configured log level changes
+    _log_level = None
+
     def __init__(self):
         """
         Formatted Messages for Warning, Logging, Errors etc
@@ -274,14 +383,15 @@ class Log:
 
     @staticmethod
     def get_logger(config_path=None):
-        import requestez.helpers as ez_helper
         if config_path is None:
             config = Config()
         else:
             config = Config(config_path)
-        ez_helper.set_log_level(config.log_level)
-        logger = ez_helper.get_logger()
-        return logger
+        if Log._logger is None or Log._log_level != config.log_level:
+            ez_helper.set_log_level(config.log_level)
+            Log._logger = ez_helper.get_logger()
+            Log._log_level = config.log_level
+        return Log._logger
 
     @staticmethod
     def critical(message, config=None):
@@ -325,6 +435,8 @@ class Error:
 
 
 class FileManager:
+    _file_cache = {}  # path -> (mtime, content) of imported non pypx files
+
     def __init__(self):
         """
         Manages Files and Controls access,
@@ -340,18 +452,26 @@ class FileManager:
         if valid[0]:
             if valid[1]:
                 return valid[1]
-            if os.path.exists(path):
+            # plain files are kept per (path, mtime), so edits are still picked up
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                cached = FileManager._file_cache.get(path)
+                if cached is not None and cached[0] == mtime:
+                    return cached[1]
                 with open(path) as f:
-                    return f.read()
-            else:
+                    content = f.read()
+            except FileNotFoundError:
                 log.critical(path, "NOT FOUND")
                 return ""
+            FileManager._file_cache[path] = (mtime, content)
+            return content
         else:
             log.critical(path + " not used")
             log.debug(valid[1])
             return ""
 
     @staticmethod
+    @functools.lru_cache(maxsize=256)
     def get_file_type(path):
         """
             Returns the file type (extension) of the given file path.
@@ -370,6 +490,9 @@ class FileManager:
         pass
 
     class Valid:
+        invalid_types = ("__init__", "valid", "error")  # attributes of this class that are not file validators
+        __slots__ = ("path", "file_type")
+
         def __init__(self, path):
             """
             Needs to be initialized for auto-detection. You may use specific validators without initializing this class.
@@ -380,7 +503,6 @@ class FileManager:
             """
             self.path = path
             self.file_type = FileManager.get_file_type(path)
-            self.invalid_types = ["__init__", "valid", "error"]
 
         def valid(self) -> list[[bool, str]]:
             """
@@ -392,7 +514,21 @@ class FileManager:
                 if self.file_type != "pypx":
                     return [True, ""]
             func = getattr(self, self.file_type, self.unknown)
-            return func(self.path)
+            if self.file_type == "pypx":
+                # pypx validation parses against the caller's contexts, the result cannot be reused
+                return func(self.path)
+            # lint results only change with the file, so they are kept per (path, mtime)
+            path = os.path.abspath(self.path)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                return func(self.path)
+            cached = validated_files.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            result = func(self.path)
+            validated_files[path] = (mtime, result)
+            return result
 
         def error(self):
             if self.file_type in self.invalid_types:
@@ -411,7 +547,6 @@ class FileManager:
                 Returns:
                 - str: Validation result.
                 """
-            import subprocess
             try:
                 eslint = Utils.get_user_home() + "\\node_modules\\eslint\\bin\\eslint.js"
                 result = subprocess.run(["node", eslint, os.path.join(str(Config().module_root), path)],
@@ -436,7 +571,6 @@ class FileManager:
             Returns:
             - str: Validation result.
             """
-            import subprocess
             try:
                 stylelint = Utils.get_user_home() + "\\node_modules\\stylelint\\bin\\stylelint.mjs"
                 config = f"{Utils.get_user_home()}\\node_modules\\stylelint-config-recommended-scss\\index.js"
@@ -494,7 +628,11 @@ class FileManager:
 
 
 class Pypx:
-    def __init__(self, content=None, fname=None, _additional_contexts=None):
+    _tailwind = None  # Tailwind builds its whole theme on construction, one instance is shared by all parsers
+    _tailwind_css = {}  # blake2b digest of the content -> generated css
+    _tailwind_lock = threading.Lock()  # pages render concurrently in the threadpool
+
+    def __init__(self, content=None, fname=None, _additional_contexts=None, _scope=None):
         """
         Parses pypx
         """
@@ -504,51 +642,20 @@ class Pypx:
             _additional_contexts = []
         content = content.replace("\t", " " * 4)
         self.content = content.split("\n")
-        self.contexts = _additional_contexts
+        self.contexts = set(_additional_contexts)
         self.fname = fname
         self.parsing = self.content.copy()
-        self.groups = [
-            ["::", "::"],  # Removed comment
-            ["?:", "?:"],  # File to be included as static asset
-            ["{{", "}}"],  # Variable Field
-            [";;", ";;"],  # HTML Attribute
-            ["[[", "]]"],  # Import Files and embed them into the generated html
-            ["(-(", ")-)"],  # Markdown Content
-            ["{[", "]}"],  # Bundling groups
-            ["+-", "-+"],  # Set Python variable values in pypx
-        ]
-        self.void_elements = [
-            "area",
-            "base",
-            "br",
-            "col",
-            "embed",
-            "hr",
-            "img",
-            "input",
-            "link",
-            "meta",
-            "param",
-            "source",
-            "track",
-            "wbr",
-        ]
-        self.elements = [
-            "!DOCTYPE html", "abbreviation", "acronym", "address", "anchor", "applet", "article", "aside",
-            "audio", "basefont", "bdi", "bdo", "bgsound", "big", "blockquote", "body", "bold", "break",
-            "button", "caption", "canvas", "center", "cite", "code", "colgroup", "column", "comment", "data",
-            "datalist", "dd", "define", "delete", "details", "dialog", "dir", "div", "dl", "dt", "embed", "fieldset",
-            "figcaption", "figure", "font", "footer", "form", "frame", "frameset", "head", "header", "heading",
-            "hgroup", "html", "iframe", "ins", "isindex", "italic", "kbd", "keygen", "label",
-            "legend", "list", "main", "mark", "marquee", "menuitem", "meter", "nav", "nobreak", "noembed",
-            "noscript", "object", "optgroup", "option", "output", "paragraphs", "phrase", "pre", "progress",
-            "q", "rp", "rt", "ruby", "s", "samp", "section", "small", "spacer", "span", "strike", "strong",
-            "style", "sub", "sup", "summary", "svg", "table", "tbody", "td", "template", "tfoot", "th", "thead",
-            "time", "title", "tr", "tt", "underline", "var", "video", "xmp"
-        ]
+        self._line_index = None
+        self.groups = _GROUPS
+        self.void_elements = _VOID_ELEMENTS
+        self.elements = _ELEMENTS
         self.parsed = ""
+        self._vars_dirty = True  # set when self.parsed may hold {{variables}} not yet resolved
         self.blocks = []
         self.static_requirements = {}
+        self.imported_files = set()  # module files this content imports or bundles, relative to the module root
+        self._scope = _scope  # variables {{placeholders}} fall back to when no frame defines them
+        self.uses_scope = False  # set when a {{variable}} was resolved outside of xtracto, no file change reflects it
         del content, fname
 
     def parse(self, layout=False):
@@ -570,57 +677,81 @@ class Pypx:
             log.warn("NO LAYOUT FILE")
             return
         children = self.parsed
-        head = re.compile("<head>(.*)</head>").findall(self.parsed)
-        head = head[0] if head else ""
+        # first <head> closed later on the same line, up to the last </head> of that line
+        head = ""
+        head_start = children.find("<head>")
+        while head_start != -1:
+            line_end = children.find("\n", head_start)
+            if line_end == -1:
+                line_end = len(children)
+            head_end = children.rfind("</head>", head_start + 6, line_end)
+            if head_end != -1:
+                head = children[head_start + 6:head_end]
+                break
+            head_start = children.find("<head>", head_start + 1)
         children = children.replace(f"<head>{head}</head>", "")
         if not children:
             log.warn("no children")
-        _contexts = [self.parsed]
-        _contexts.extend(self.contexts)
-        _self = Parser(path="_layout.pypx", layout=True, _additional_contexts=_contexts)
+        _contexts = set(self.contexts)
+        _contexts.add(self.parsed)
+        _self = Parser(path="_layout.pypx", layout=True, _additional_contexts=_contexts, _scope=self._scope)
         _self.render()
         self.static_requirements.update(_self.static_requirements)
+        self.imported_files.update(_self.pypx_parser.imported_files)
+        self.uses_scope = self.uses_scope or _self.pypx_parser.uses_scope
         if self.parsed not in _self.html_content:
             log.critical("please put {{children}} in the layout file where the page content must appear")
         self.parsed = _self.html_content
 
     def make_groups_valid(self):
+        # single pass over the lines, a logical line collects its parts until every group is closed
+        lines = self.parsing
+        total = len(lines)
+        merged = []
         num = 0
-        while num < len(self.parsing):
-            line = self.parsing[num]
+        while num < total:
+            parts = [lines[num]]
+            num += 1
             for value1, value2 in self.groups:
+                # counts are kept incrementally, no delimiter can span the "#&N#" joint
+                line = "#&N#".join(parts)
+                opened = line.count(value1)
+                closed = line.count(value2) if value1 != value2 else 0
                 while ((
-                               (line.count(value1) != line.count(value2)) and (value1 != value2)
+                               (opened != closed) and (value1 != value2)
                        )
                        or (
-                               (line.count(value1) % 2 != 0) and (value1 == value2)
+                               (opened % 2 != 0) and (value1 == value2)
                        )):
-                    try:
-                        self.parsing[num] += "#&N#" + self.parsing[num + 1]
-                        self.parsing.pop(num + 1)
-                        line = self.parsing[num]
-                    except IndexError:
+                    if num >= total:
                         # log.error("Syntax error in file being parsed", "FILE CONTENT:\n" + "\n".join(self.parsing))
+                        merged.append("#&N#".join(parts))
+                        self.parsing = merged
                         self.parsed = []
                         return
-            num += 1
+                    next_line = lines[num]
+                    num += 1
+                    parts.append(next_line)
+                    opened += next_line.count(value1)
+                    if value1 != value2:
+                        closed += next_line.count(value2)
+            merged.append("#&N#".join(parts))
+        self.parsing = merged
 
     def parse_comments(self):
-        self.parsing = [
-            i
-            for i in
-            re.sub("(::.*?::)", "", "\n".join(self.parsing)).split("\n")
-            if i
-        ]
+        # comments never span lines, so each line is stripped on its own
+        self.parsing = [i for i in (_COMMENT_RE.sub("", line) for line in self.parsing) if i]
 
     def parse_static_import(self):
-        static_regex = re.compile("\?:(.*?)\?:")
-        found = static_regex.findall(self.parsed)
         static_requirements = {}
-        for i in found:
+
+        def _replace(match):
+            i = match.group(1)
             sanitized_i = i.replace("./", "")
             static_requirements[sanitized_i] = i
-            self.parsed = self.parsed.replace("?:" + i + "?:", f"/__static/{sanitized_i}")
+            return f"/__static/{sanitized_i}"
+
+        self.parsed = _STATIC_RE.sub(_replace, self.parsed)
         self.static_requirements.update(static_requirements)
         return static_requirements
 
@@ -628,7 +759,6 @@ class Pypx:
         ori_content = content
         if content is None:
             content = self.parsed
-        _loaders_match = re.compile("\+\$(.*?)\$\+")
         content = content.replace("#&N#", "\n")
         if ori_content is None:
             self.parsed = content
@@ -637,145 +767,178 @@ class Pypx:
     def parse_blocks(self):
         stack = []  # [[indent, element, children...]...]
         parent_indent = []
+        # containers[depth] is the children list a block at that depth gets appended to,
+        # so only the integer indents are compared instead of walking the tree for every line
+        containers = [stack]
         for line in self.parsing:
-            indent = len(line) - len(line.lstrip(" "))
-            line = line.lstrip(" ")
-            if not line:
-                continue
-            if not stack:
-                stack.append([indent, line, []])
-                parent_indent.append(indent)
+            stripped = line.lstrip(" ")
+            if not stripped:
                 continue
+            indent = len(line) - len(stripped)
             curr_depth = 0
-            parent = stack
-            while (curr_depth < len(parent_indent)) and (indent > parent_indent[curr_depth]):
-                if indent == parent_indent[curr_depth]:
-                    break
+            depth_limit = len(parent_indent)
+            while curr_depth < depth_limit and indent > parent_indent[curr_depth]:
                 curr_depth += 1
-                parent = parent[-1]
-                if len(parent) == 3:
-                    parent = parent[2]
-                if not parent:
-                    break
-            parent_indent = parent_indent[:curr_depth]
-            parent.append([indent, line, []])
+            del parent_indent[curr_depth:]
+            del containers[curr_depth + 1:]
+            block = [indent, stripped, []]
+            containers[curr_depth].append(block)
+            containers.append(block[2])
             parent_indent.append(indent)
         self.blocks = stack
 
+    def _line_numbers(self, element):
+        """
+        Returns the source line numbers whose stripped content is element (case insensitive),
+        the index is only built the first time a warning needs a line number
+        """
+        if self._line_index is None:
+            self._line_index = {}
+            for num, line in enumerate(self.content):
+                self._line_index.setdefault(line.lstrip(" ").lower(), []).append(num)
+        return self._line_index.get(element.lower(), ())
+
     def load_blocks(self, blocks=None):
         if blocks is None:
             blocks = self.blocks.copy()
-        loaded_block = ""
-        orignal_blocks = [i for i in blocks.copy()]
-        for block in blocks:
-            _block_orignal = orignal_blocks[orignal_blocks.index(block)].copy()
+        loaded_block = []
+        # [block, children_done] pairs, walked depth first without recursing per tree level
+        stack = [[block, False] for block in reversed(blocks)]
+        while stack:
+            block, children_done = stack.pop()
+            if children_done:
+                loaded_block.append(f"</{block[1]}>")
+                continue
+            tag = block[1].lower()
             if block[2]:
-                loaded_block += "<" + block[1]
+                loaded_block.append("<" + block[1])
                 for child in block[2].copy():
                     # THIS SECTION IS FOR WARNING WHEN ELEMENT DOES NOT HAVE CHILDREN
-                    if block[1].lower() in self.elements and len(block[2]) == 1 and block[2][0][1].startswith(";;"):
+                    if tag in self.elements and len(block[2]) == 1 and block[2][0][1].startswith(";;"):
                         pred_line = 0
-                        for num, line in enumerate(self.content):
-                            if line.lstrip(" ").lower() == block[1].lower():
-                                forward = 1
-                                while not line.lstrip(" "):
-                                    forward += 1
-                                    if num + forward > len(self.content):
-                                        pred_line = num + forward
-                                        break
-                                if pred_line == 0:
-                                    if self.content[num + forward].lstrip(" ").lower().startswith(
-                                            _block_orignal[2][0][1].lower()):
-                                        pred_line = num + forward
+                        for num in self._line_numbers(block[1]):
+                            line = self.content[num]
+                            forward = 1
+                            while not line.lstrip(" "):
+                                forward += 1
+                                if num + forward > len(self.content):
+                                    pred_line = num + forward
+                                    break
+                            if pred_line == 0:
+                                if self.content[num + forward].lstrip(" ").lower().startswith(
+                                        block[2][0][1].lower()):
+                                    pred_line = num + forward
                         log.warn(f"\n{self.fname}:{pred_line} -> element \"" + block[
                             1] + "\" must have children elements/content this has been considered as an element as it has attributes but it is recomended that you add content")
                         # SECTION FOR WARNING WHEN ELEMENT DOES NOT HAVE CHILDREN ENDS HERE
                     if child[1].startswith(";;"):
-                        loaded_block += " " + child[1][2:-2]
+                        loaded_block.append(" " + child[1][2:-2])
                         block[2].remove(child)
                 if not block[2]:
-                    if block[1].lower() in self.elements:
-                        loaded_block += f"></{block[1]}>"
+                    if tag in self.elements:
+                        loaded_block.append(f"></{block[1]}>")
                     else:
-                        loaded_block += " />"
-                else:
-                    loaded_block += ">"
+                        loaded_block.append(" />")
+                    loaded_block.append(f"</{block[1]}>")
+                    continue
+                loaded_block.append(">")
 
-                    # THIS SECTION IS FOR WARNING WHEN VOID ELEMENT HAS CHILDREN
-                    if block[1].lower() in self.void_elements:
-                        pred_line = 0
-                        for num, line in enumerate(self.content):
-                            if line.lstrip(" ").lower() == block[1].lower():
-                                forward = 1
-                                while self.content[num + forward].lstrip(" ").startswith(";;"):
-                                    forward += 1
-                                    if num + forward > len(self.content):
-                                        pred_line = num + forward - 1
-                                        break
-                                if pred_line == 0:
-                                    if self.content[num + forward].lstrip(" ").lower().startswith(
-                                            block[2][0][1].lower()):
-                                        pred_line = num + forward
-                                pred_line += 1
-                        log.warn(f"\n{self.fname}:{pred_line} -> element \"" + block[
-                            1] + "\" cannot have children elements/content")
-                    # SECTION FOR WARNING WHEN VOID ELEMENT HAS CHILDREN ENDS HERE
+                # THIS SECTION IS FOR WARNING WHEN VOID ELEMENT HAS CHILDREN
+                if tag in self.void_elements:
+                    pred_line = 0
+                    for num in self._line_numbers(block[1]):
+                        line = self.content[num]
+                        forward = 1
+                        while self.content[num + forward].lstrip(" ").startswith(";;"):
+                            forward += 1
+                            if num + forward > len(self.content):
+                                pred_line = num + forward - 1
+                                break
+                        if pred_line == 0:
+                            if self.content[num + forward].lstrip(" ").lower().startswith(
+                                    block[2][0][1].lower()):
+                                pred_line = num + forward
+                        pred_line += 1
+                    log.warn(f"\n{self.fname}:{pred_line} -> element \"" + block[
+                        1] + "\" cannot have children elements/content")
+                # SECTION FOR WARNING WHEN VOID ELEMENT HAS CHILDREN ENDS HERE
 
-                    loaded_block += self.load_blocks(block[2])
-                loaded_block += f"</{block[1]}>"
-            elif not block[2]:
+                stack.append([block, True])
+                stack.extend([child, False] for child in reversed(block[2]))
+            else:
                 # THIS SECTION IS FOR WARNING WHEN ELEMENT DOES NOT HAVE CHILDREN
-                if block[1].lower() in self.elements:
+                if tag in self.elements:
                     pred_line = 0
-                    for num, line in enumerate(self.content):
-                        if line.lstrip(" ").lower() == block[1].lower():
-                            forward = 1
-                            while self.content[num + forward].lstrip(" ").startswith(";;") or not line.lstrip(" "):
-                                forward += 1
-                                if num + forward > len(self.content):
-                                    pred_line = num + forward
-                                    break
-                            if pred_line == 0:
-                                nextx_indent = len(self.content[num + forward]) - len(
-                                    self.content[num + forward].lstrip(" "))
-                                curendtx_indent = len(self.content[num]) - len(self.content[num].lstrip(" "))
-                                if nextx_indent <= curendtx_indent:
-                                    pred_line = num + forward
+                    for num in self._line_numbers(block[1]):
+                        line = self.content[num]
+                        forward = 1
+                        while self.content[num + forward].lstrip(" ").startswith(";;") or not line.lstrip(" "):
+                            forward += 1
+                            if num + forward > len(self.content):
+                                pred_line = num + forward
+                                break
+                        if pred_line == 0:
+                            nextx_indent = len(self.content[num + forward]) - len(
+                                self.content[num + forward].lstrip(" "))
+                            curendtx_indent = len(self.content[num]) - len(self.content[num].lstrip(" "))
+                            if nextx_indent <= curendtx_indent:
+                                pred_line = num + forward
                     log.warn(f"\n{self.fname}:{pred_line} -> element \"" + block[
                         1] + "\" must have children elements/content as this does not have any children it will be considered as plain text")
                 # SECTION FOR WARNING WHEN ELEMENT DOES NOT HAVE CHILDREN ENDS HERE
-                loaded_block += block[1]
-                loaded_block += "\n"
+                loaded_block.append(block[1])
+                loaded_block.append("\n")
+        loaded_block = "".join(loaded_block)
         if blocks == self.blocks:
             self.parsed = loaded_block
         return loaded_block
 
-    def load_variables(self, _content=None, _load_list: list or None = None, _addnl_var_contexts: list or None = None, _parse_tailwind: bool = False):
+    @staticmethod
+    def generate_tailwind(content):
+        """
+        Generates the tailwind css for the classes used in content.
+        Results are cached by a digest of the content, so unchanged pages reuse the css across renders
+        without the cache holding on to every page's full text.
+        """
+        key = hashlib.blake2b(content.encode(), digest_size=16).digest()
+        css = Pypx._tailwind_css.get(key)
+        if css is None:
+            with Pypx._tailwind_lock:
+                if Pypx._tailwind is None:
+                    Pypx._tailwind = Tailwind()
+            css = Pypx._tailwind.generate(content)
+            with Pypx._tailwind_lock:
+                if len(Pypx._tailwind_css) >= 256:
+                    del Pypx._tailwind_css[next(iter(Pypx._tailwind_css))]  # drop the oldest entry
+                Pypx._tailwind_css[key] = css
+        return css
+
+    def load_variables(self, _content=None, _load_list: list or None = None, _addnl_var_contexts: set or None = None, _parse_tailwind: bool = False):
         _original_content = _content
         if _content is None:
             _content = self.parsed
+        if "{{" not in _content:
+            if _original_content is None:
+                self._vars_dirty = False
+            return _content
         if _load_list is None:
             _load_list = []
-        _loaders_match = re.compile("\+\$(.*?)\$\+")
         if _addnl_var_contexts is None:
             _addnl_var_contexts = self.contexts
         else:
-            self.contexts = list(set(self.contexts))
-            _addnl_var_contexts.extend(self.contexts)
-        _addnl_var_contexts.append(_content)
-        _addnl_var_contexts = list(set(_addnl_var_contexts))
+            _addnl_var_contexts.update(self.contexts)
+        _addnl_var_contexts.add(_content)
         _all_contexts = "\n".join(_addnl_var_contexts)
-        for _load in _loaders_match.findall(_all_contexts):
+        for _load in _LOADERS_RE.findall(_all_contexts):
             _load_list.append(_load.split("=", 1))
-        for var, val in _load_list:
-            locals()[var] = val
-        if _load_list:
-            del var, val
-        _vars_reg = re.compile(r'\{\{(.*?)}}')
-        _vars = _vars_reg.findall(_content)
-        for _var in _vars:
-            _ori_var = "{{" + _var + "}}"
-            _var = _var.strip(" ")
+        _loaded = dict(_load_list)  # +$name=value$+ loaders and import parameters, visible as variables of this scope
+        _origins = set()
+        # one pass over the content, values are looked up here so the frame walk still starts in this scope
+        _parts = []
+        _last = 0
+        _unresolved = False  # a value such as {{children}} can bring in placeholders of its own
+        for _match in _VARS_RE.finditer(_content):
+            _var = _match.group(1).strip(" ")
             _var = _var.split("=", 1)
             if len(_var) == 2:
                 _default = _var[1]
@@ -787,64 +950,69 @@ class Pypx:
             if _var == "tailwind_css_content":
                 if not _parse_tailwind:
                     continue
-                if "children" in _vars:
+                if "children" in _VARS_RE.findall(_content):
                     _all_contexts += Utils.get_variable_value_from_nearest_frame(_variable_name="children", _default_value="",
-                                                                     _raise_error=False)
-                _tailwind = Tailwind()
-                _value = _tailwind.generate(_all_contexts)
+                                                                     _raise_error=False, _locals=_loaded,
+                                                                     _scope=self._scope, _origins=_origins)
+                _value = Pypx.generate_tailwind(_all_contexts)
             else:
                 _value = Utils.get_variable_value_from_nearest_frame(_variable_name=_var, _default_value=_default,
-                                                                     _raise_error=_raise_error)
-            _content = _content.replace(_ori_var, _value)
+                                                                     _raise_error=_raise_error, _locals=_loaded,
+                                                                     _scope=self._scope, _origins=_origins)
+            if isinstance(_value, str) and "{{" in _value:
+                _unresolved = True
+            _parts.append(_content[_last:_match.start()])
+            _parts.append(_value)
+            _last = _match.end()
+        _parts.append(_content[_last:])
+        _content = "".join(_parts)
+        if _origins:
+            self.uses_scope = True
         if _original_content is None:
             self.parsed = _content
+            self._vars_dirty = _unresolved
         return _content
 
+    @staticmethod
+    def group_parameters(pattern, group):
+        """
+        Returns the ||key=value|| parameters of an import or bundle group as [[key, value]...]
+        """
+        # the lazy capture ends at the first "||", so a match never holds more than one parameter
+        return [_TRIM_RE.sub("", param.replace("#|#", "|")).split("=", 1) for param in reversed(pattern.findall(group))]
+
     def do_imports(self, content=None):
         ori_cont = content
         if content is None:
             content = self.parsed
-        _contexts = [content]
-        _contexts.extend(self.contexts)
+        _contexts = set(self.contexts)
+        _contexts.add(content)
         fixed = Pypx(content=content, _additional_contexts=_contexts)
         fixed.make_groups_valid()
         fixed = "\n".join(fixed.parsing)
-        file_groups = re.compile("(\[\[.*?]])")
-        files = re.compile(r"\[\[([a-zA-Z0-9. /\\]+)(?:.*?)?]]")
-        parameters = re.compile("\[\[[a-zA-Z0-9.]+\|\|(.*?)\|\|.*?")
-        for group in file_groups.findall(fixed):
-            file = files.findall(group)
+        for group in _FILEGROUP_IMPORT_RE.findall(fixed):
+            file = _FILE_IMPORT_RE.findall(group)
             file = file[0]
-            parms = parameters.findall(group)
-            final_parms = []
-            while parms:
-                param = parms.pop()
-                if len(param.split("||")) > 1:
-                    final_parms.extend(param.split("||"))
-                    continue
-                final_parms.append(param)
-            parms = [i.replace("#|#", "|") for i in final_parms]
-            for num, param in enumerate(parms.copy()):
-                parms[num] = param.strip("#&N#").strip(" ").strip("#&N#").strip(" ")
-            parms = [i.split("=") for i in parms]  # [[key, value]...]
+            parms = Pypx.group_parameters(_PARAM_IMPORT_RE, group)
             cont = FileManager.get_file_if_valid(file)
+            self.imported_files.add(file)
             if isinstance(cont, Parser):
-                self.contexts.extend(cont.contexts)
+                self.contexts.update(cont.contexts)
                 self.static_requirements.update(cont.static_requirements)
+                self.imported_files.update(cont.pypx_parser.imported_files)
                 cont = cont.html_content
-            self.contexts.append(cont)
-            self.contexts.extend([content, fixed])
+            self.contexts.update((cont, content, fixed))
             cont = self.load_variables(_content=cont, _load_list=parms, _addnl_var_contexts=self.contexts)
+            if "{{" in cont:
+                self._vars_dirty = True
             fixed = fixed.replace(group, cont)
-            self.contexts.append(fixed)
-            self.contexts.append(cont)
+            self.contexts.update((fixed, cont))
         if ori_cont is None:
             self.parsed = fixed
         return fixed
 
     def generate_bundle(self, content="", path_name=""):
-        import datetime
-        start = datetime.datetime.now()
+        start = time.perf_counter()
         oric = content if content else None
         if not content:
             content = "\n".join(self.parsing)
@@ -852,126 +1020,159 @@ class Pypx:
             path_name = self.fname
             if not path_name:
                 log.critical("You cannot use bundles while generating from string")
-                log.debug("PATH NAME IS: \n" + path_name)
+                log.debug(f"PATH NAME IS: \n{path_name}")
                 return
-        path_name = path_name.replace("/", "\\")
         if path_name.count(".") > 1:
-            path_name = ".".join(path_name.split(".")[:-1])
-        if path_name.startswith(".\\"):
-            pass
-        elif path_name.startswith("\\"):
-            path_name = "." + path_name
-        else:
-            path_name = ".\\" + path_name
+            path_name = os.path.splitext(path_name)[0]
+        path_name = os.path.join(".", os.path.normpath(path_name.lstrip("/\\")))
+        module_root = str(Config().module_root)
+        mtime_cache = {}
+
+        def get_mtime(_file):
+            if _file not in mtime_cache:
+                try:
+                    mtime_cache[_file] = str(os.path.getmtime(os.path.join(module_root, _file)))
+                except FileNotFoundError:
+                    try:
+                        mtime_cache[_file] = str(os.path.getmtime(_file))
+                    except FileNotFoundError:
+                        mtime_cache[_file] = ""
+            return mtime_cache[_file]
+
         fixed = Pypx(content=content, _additional_contexts=self.contexts)
         fixed.make_groups_valid()
         fixed = "\n".join(fixed.parsing)
-        file_groups = re.compile("(\[\{.*?}])")
-        files = re.compile(r"\[\{([a-zA-Z0-9. /\\]+)(?:.*?)?}]")
-        parameters = re.compile("\[\{[a-zA-Z0-9.]+\|\|(.*?)\|\|.*?")
         bundles = {}
-        for group in file_groups.findall(fixed):
-            file = files.findall(group)
+        for group in _FILEGROUP_BUNDLE_RE.findall(fixed):
+            file = _FILE_BUNDLE_RE.findall(group)
             file = file[0]
+            parms = Pypx.group_parameters(_PARAM_BUNDLE_RE, group)
+            self.imported_files.add(file)
             bgroup = file.split(".")[-1]
             if bgroup in bundles:
-                bundles[bgroup]["files"].append(group)
-                bundles[bgroup]["tohash"] += file + str(os.path.getmtime(os.path.join(str(Config().module_root), file)))
+                bundles[bgroup]["files"].append((group, file, parms))
+                bundles[bgroup]["tohash"] += file + get_mtime(file)
             else:
-                try:
-                    mtime = str(os.path.getmtime(os.path.join(str(Config().module_root), file)))
-                except FileNotFoundError:
-                    try:
-                        mtime = str(os.path.getmtime(file))
-                    except FileNotFoundError:
-                        mtime = ""
-                bundles[bgroup] = {"files": [group], "content": "",
-                                   "tohash": file + mtime,
-                                   "hash": ""}
+                bundles[bgroup] = {"files": [(group, file, parms)], "content_parts": [],
+                                   "tohash": file + get_mtime(file),
+                                   "hash": "", "path": "", "reused": False}
 
+        # bundles of this file are matched on their basename, "<name>.<hash>.<group>"
+        bundle_prefix = os.path.basename(path_name) + "."
         for bgroup in bundles:
-            h = 2166136261
-            for byte in bundles[bgroup]["tohash"].encode():
-                h = (h ^ byte) * 16777619
-            somehash = format(h & 0xFFFFFFFFFFFFFFFF, 'x')[-8:]
+            somehash = hashlib.blake2b(bundles[bgroup]["tohash"].encode(), digest_size=4).hexdigest()
             bundles[bgroup]["hash"] = somehash
-
-            # USE EXISTING BUNDLE IF THE FILES ARE UNMODIFIED
-            if os.path.exists(
-                    os.path.join(str(Config().module_root), path_name + "." + bundles[bgroup]["hash"] + "." + bgroup)):
+            bundle_path = os.path.join(module_root, f"{path_name}.{somehash}.{bgroup}")
+            bundles[bgroup]["path"] = bundle_path
+
+            file_dir = os.path.dirname(bundle_path)
+            bundle_name = os.path.basename(bundle_path)
+            endwith = "." + bgroup
+            existing = []
+            with os.scandir(file_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith(bundle_prefix) and entry.name.endswith(endwith) and entry.is_file():
+                        # USE EXISTING BUNDLE IF THE FILES ARE UNMODIFIED
+                        if entry.name == bundle_name:
+                            bundles[bgroup]["reused"] = True
+                            break
+                        existing.append(entry)
+            if bundles[bgroup]["reused"]:
                 continue
 
             # REMOVE EXISTING BUNDLES WITH SAME NAME
-            file_dir = os.path.dirname(
-                os.path.join(str(Config().module_root), path_name + "." + bundles[bgroup]["hash"] + "." + bgroup))
-            for file in os.listdir(file_dir):
-                file = os.path.join(file_dir, file)
-                startwith = str(os.path.join(str(Config().module_root), path_name)) + "."
-                endwith = "." + bgroup
-                if os.path.isfile(file) and file.startswith(startwith) and file.endswith(endwith):
-                    os.remove(file)
-
-            for group in bundles[bgroup]["files"]:
-                file = files.findall(group)
-                file = file[0]
-                parms = parameters.findall(group)
-                final_parms = []
-                while parms:
-                    param = parms.pop()
-                    if len(param.split("||")) > 1:
-                        final_parms.extend(param.split("||"))
-                        continue
-                    final_parms.append(param)
-                parms = [i.replace("#|#", "|") for i in final_parms]
-                for num, param in enumerate(parms.copy()):
-                    parms[num] = param.strip("#&N#").strip(" ").strip("#&N#").strip(" ")
-                parms = [i.split("=") for i in parms]  # [[key, value]...]
-                cont = FileManager.get_file_if_valid(file)
+            for entry in existing:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass  # another render removed it first
+
+            # READ THE GROUP FILES CONCURRENTLY, PYPX STAYS ON THIS THREAD AS IT RESOLVES VARIABLES FROM CALLER FRAMES
+            prefetch = list(dict.fromkeys(file for _, file, _ in bundles[bgroup]["files"]
+                                          if FileManager.get_file_type(file) != "pypx"))
+            prefetched = {}
+            if len(prefetch) > 1:
+                with ThreadPoolExecutor(max_workers=min(8, len(prefetch))) as executor:
+                    prefetched = dict(zip(prefetch, executor.map(FileManager.get_file_if_valid, prefetch)))
+
+            for group, file, parms in bundles[bgroup]["files"]:
+                if file in prefetched:
+                    cont = prefetched[file]
+                else:
+                    cont = FileManager.get_file_if_valid(file)
                 if isinstance(cont, Parser):
                     self.static_requirements.update(cont.static_requirements)
+                    self.imported_files.update(cont.pypx_parser.imported_files)
                     cont = cont.html_content
-                self.contexts.append(cont)
-                self.contexts.extend([self.parsed, content, fixed, ])
+                self.contexts.update((cont, self.parsed, content, fixed))
                 cont = self.load_variables(_content=cont, _load_list=parms, _addnl_var_contexts=self.contexts)
-                self.contexts.append(cont)
-                bundles[bgroup]["content"] += cont
+                self.contexts.add(cont)
+                bundles[bgroup]["content_parts"].append(cont)
+        replacements = {}
         for bgroup in bundles:
-            with open(os.path.join(str(Config().module_root), path_name + "." + bundles[bgroup]["hash"] + "." + bgroup),
-                      "wt") as f:
-                f.write(bundles[bgroup]["content"])
-            while len(bundles[bgroup]["files"]) > 1:
-                popped = bundles[bgroup]["files"].pop(0)
-                content = content.replace(popped, "")
-            popped = bundles[bgroup]["files"].pop(0)
-            f_url = (path_name + "." + bundles[bgroup]["hash"] + "." + bgroup)[1::].replace("\\", "/")
-            content = content.replace(popped, f_url)
-            elapsed_time = datetime.datetime.now() - start
-            if elapsed_time > datetime.timedelta(seconds=1):
-                print(f'CREATED BUNDLE : {f_url}\nIN: {elapsed_time}')
+            if not bundles[bgroup]["reused"]:
+                # WRITE TO A TEMPORARY FILE AND SWAP IT IN, CONCURRENT RENDERS NEVER SEE A PARTIAL BUNDLE
+                temp_path = f"{bundles[bgroup]['path']}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    with open(temp_path, "wb") as f:
+                        f.write("".join(bundles[bgroup]["content_parts"]).encode("utf-8"))
+                    os.replace(temp_path, bundles[bgroup]["path"])
+                except Exception:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    raise
+            # THE LAST REFERENCE OF A GROUP POINTS TO THE BUNDLE, THE OTHERS ARE DROPPED
+            for group, _, _ in bundles[bgroup]["files"][:-1]:
+                replacements[group] = ""
+            f_url = (path_name + "." + bundles[bgroup]["hash"] + "." + bgroup)[1::].replace(os.sep, "/")
+            replacements[bundles[bgroup]["files"][-1][0]] = f_url
+            elapsed_time = time.perf_counter() - start
+            if elapsed_time > 1.0:
+                print(f'CREATED BUNDLE : {f_url}\nIN: {elapsed_time:.3f}s')
+        if replacements:
+            content = re.sub("|".join(re.escape(group) for group in sorted(replacements, key=len, reverse=True)),
+                             lambda match: replacements[match.group(0)], content)
         if oric is None:
             self.parsing = content.split("\n")
         return content
 
 
 class Markdown:
+    _markdown = None  # markdown2.markdown, imported on first use as markdown2 is not a hard requirement
+
     def __init__(self, content=""):
         """
         Parses markdown
         """
-        import markdown2
+        if Markdown._markdown is None:
+            import markdown2
+            Markdown._markdown = markdown2.markdown
         self.content = content
-        self.parsed = markdown2.markdown(content)
+        self.parsed = Markdown._markdown(content)
 
 
 class App:
+    _warned = False  # the incomplete feature warning is logged once per process
+
     def __init__(self, app: FastAPI, auto_run=True, uvicorn_kwargs=None):
-        for _ in range(1):
+        if not App._warned:
             log.warn("THIS FEATURE IS NOT IMPLEMENTED COMPLETELY")
+            App._warned = True
         self.app = app
+        # pages render in worker threads whose stack does not reach the scope that created the app,
+        # its variables are handed to the parser explicitly
+        self._scope = App._creator_scope(sys._getframe(1))
+        self._production = Config().production
+        self._layout = Utils.layout_exists()
+        self._favicon_path = os.path.join(Utils.get_project_root(), "favicon.ico")
+        self._has_favicon = os.path.exists(self._favicon_path)
         self.add_routes()
         self.not_authorized = HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                                             detail="You are not authorized to access this file")
         self.static_assets = {}
+        self._pages = {}  # path -> (dependency mtimes or None in production, html)
+        if self._production:
+            self.prebuild_pages()
         if uvicorn_kwargs is None:
             uvicorn_kwargs = {}
         if auto_run:
@@ -979,7 +1180,7 @@ class App:
             uvicorn.run(self.app, **uvicorn_kwargs)
 
     def add_routes(self):
-        @self.app.middleware("*")
+        @self.app.middleware("http")
         async def set_assisted_by_header(request: Request, next_process):
             resp = await next_process(request)
             resp.headers['X-Assisted-By'] = 'eXTRACTO by shashstormer'
@@ -990,31 +1191,121 @@ class App:
             file_path = self.static_assets.get(path, False)
             if not file_path:
                 raise self.not_authorized
-            with open(file_path, "rb") as f:
-                file_content = f.read()
-            return Response(file_content)
+            return FileResponse(file_path)
 
         @self.app.get("/{path:path}")
         async def serve_pages(path: str = ""):
             if path == "":
                 path += "index"
-            _pypx_c1 = "../" in path
-            _pypx_c2 = path.startswith("_")
-            _pypx_c3 = "..\\/" in path
-            _pypx_overall = _pypx_c1 or _pypx_c2 or _pypx_c3
-            if _pypx_overall:
+            if _UNSAFE_PATH_RE.search(path):
                 raise self.not_authorized
-            if len(path.split("/")[-1].split(".")) == 1:
+            last = path.rsplit("/", 1)[-1]
+            if "." not in last:
                 path += ".pypx"
             if path == "favicon.ico":
-                if os.path.exists(Utils.get_project_root() + "/favicon.ico"):
-                    return FileResponse(Utils.get_project_root() + "/favicon.ico")
+                # outside production a favicon added while the app runs is picked up
+                has_favicon = self._has_favicon if self._production else os.path.exists(self._favicon_path)
+                if has_favicon:
+                    return FileResponse(self._favicon_path)
                 else:
                     import xtracto._images
                     return xtracto._images.favicon
-            _pypx_parsed = Parser(path=path, layout=Utils.layout_exists())
-            _pypx_parsed.render()
-            _pypx_parsed.load_tailwind()
-            _pypx_parsed.clear_variables()
-            self.static_assets.update(_pypx_parsed.static_requirements)
-            return Response(_pypx_parsed.html_content, media_type="text/html")
+            cached = self._pages.get(path)
+            if cached is not None and cached[0] is None:
+                # production pages are never rechecked, no need to leave the event loop
+                html_content = cached[1]
+            else:
+                html_content = await run_in_threadpool(self._serve_page, path)
+            return Response(html_content, media_type="text/html")
+
+    def prebuild_pages(self):
+        """
+        Renders every servable page once, so production requests are answered from memory.
+        """
+        pages_root = str(Config().pages_root)
+        paths = []
+        for root, _, files in os.walk(pages_root):
+            for name in files:
+                if not name.endswith(".pypx"):
+                    continue
+                path = os.path.relpath(os.path.join(root, name), pages_root).replace(os.sep, "/")
+                if not _UNSAFE_PATH_RE.search(path):
+                    paths.append(path)
+        for path in paths:
+            try:
+                self._render_page(path)
+            except Exception as e:
+                log.warn(f"could not prebuild {path}, it will be rendered per request: {e}")
+
+    def _render_page(self, path):
+        """
+        Parses and renders a page, this is run in the threadpool so rendering does not block the event loop.
+        """
+        _layout = self._layout if self._production else Utils.layout_exists()
+        _pypx_parsed = Parser(path=path, layout=_layout, _scope=self._scope)
+        _pypx_parsed.render()
+        _pypx_parsed.load_tailwind()
+        _pypx_parsed.clear_variables()
+        self.static_assets.update(_pypx_parsed.static_requirements)
+        if self._production:
+            stamp = None
+        elif _pypx_parsed.pypx_parser.uses_scope:
+            # values from python scope can change without any file changing, such pages are rendered per request
+            self._pages.pop(path, None)
+            return _pypx_parsed.html_content
+        else:
+            config = Config()
+            pages_root = str(config.pages_root)
+            module_root = str(config.module_root)
+            dependencies = [os.path.join(pages_root, path), os.path.join(pages_root, "_layout.pypx"),
+                            os.path.join(str(config.project_root), "_layout.pypx"), Utils.get_config_file()]
+            dependencies.extend(os.path.join(module_root, file) for file in _pypx_parsed.pypx_parser.imported_files)
+            stamp = tuple((dependency, App._mtime(dependency)) for dependency in dependencies)
+        self._pages[path] = (stamp, _pypx_parsed.html_content)
+        return _pypx_parsed.html_content
+
+    def _serve_page(self, path):
+        """
+        Returns the cached page while it is fresh, otherwise renders it again.
+        Runs in the threadpool as checking freshness stats every file the page depends on.
+        """
+        html_content = self._cached_page(path)
+        if html_content is None:
+            html_content = self._render_page(path)
+        return html_content
+
+    def _cached_page(self, path):
+        """
+        Returns the rendered page if none of the files it was built from changed since, otherwise None.
+        Production pages are never rechecked.
+        """
+        cached = self._pages.get(path)
+        if cached is None:
+            return None
+        stamp, html_content = cached
+        if stamp is not None:
+            for dependency, mtime in stamp:
+                if App._mtime(dependency) != mtime:
+                    return None
+        return html_content
+
+    @staticmethod
+    def _creator_scope(frame):
+        """
+        Variables visible from the given frame outwards, nearest first as in the frame walk,
+        followed by the module globals of the given frame
+        """
+        scopes = []
+        creator_globals = frame.f_globals
+        while frame:
+            scopes.append(frame.f_locals)
+            frame = frame.f_back
+        scopes.append(creator_globals)
+        return ChainMap(*scopes)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None